@@ -1,7 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
-from .routers import teams, drivers, races, results
+from .routers import teams, drivers, races, results, recommendations, scoring, matchups, bulk
 
 app = FastAPI(title="F1 Fantasy API")
 
@@ -19,6 +19,10 @@ app.include_router(teams.router, prefix="/api", tags=["teams"])
 app.include_router(drivers.router, prefix="/api", tags=["drivers"])
 app.include_router(races.router, prefix="/api", tags=["races"])
 app.include_router(results.router, prefix="/api", tags=["results"])
+app.include_router(recommendations.router, prefix="/api", tags=["recommendations"])
+app.include_router(scoring.router, prefix="/api", tags=["scoring"])
+app.include_router(matchups.router, prefix="/api", tags=["matchups"])
+app.include_router(bulk.router, prefix="/api", tags=["bulk"])
 
 
 @app.get("/")
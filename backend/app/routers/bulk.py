@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+import csv
+import os
+import tempfile
+
+from ..utils.bulk_io import BulkDataError, COLLECTIONS, FORMATS, export_records, import_records
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def check_collection(collection, file_format):
+    """Validate the collection and format of a bulk request"""
+    if collection != "all" and collection not in COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Collection '{collection}' not found")
+    if file_format not in FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Format must be one of: {', '.join(FORMATS)}"
+        )
+    if collection == "all" and file_format != "ndjson":
+        raise HTTPException(status_code=400, detail="All collections are only supported as NDJSON")
+
+def import_file(collection, file_path, file_format, on_conflict):
+    """Import a spooled upload from disk"""
+    with open(file_path, "r", newline="") as f:
+        return import_records(collection, f, file_format, on_conflict)
+
+@router.get("/export/{collection}")
+async def export_collection(collection: str, format: str = "ndjson"):
+    """Stream a collection, or all collections, as NDJSON or CSV"""
+    check_collection(collection, format)
+    return StreamingResponse(
+        export_records(collection, format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{format}"'},
+    )
+
+@router.post("/import/{collection}")
+async def import_collection(
+    collection: str,
+    request: Request,
+    format: str = "ndjson",
+    on_conflict: str = "error",
+):
+    """
+    Import records from a streamed NDJSON or CSV request body.
+    The body is spooled to disk as it arrives and then validated and indexed
+    record by record. Nothing is saved unless every record is valid.
+    """
+    check_collection(collection, format)
+
+    fd, upload_path = tempfile.mkstemp(suffix=f".{format}")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+
+        counts = await run_in_threadpool(
+            import_file, collection, upload_path, format, on_conflict
+        )
+    except (BulkDataError, UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.remove(upload_path)
+
+    return {"message": f"Import into {collection} complete", "collections": counts}
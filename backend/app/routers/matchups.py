@@ -0,0 +1,150 @@
+from fastapi import APIRouter, HTTPException
+
+from .drivers import DRIVERS_FILE
+from .results import read_data, RESULTS_FILES
+from .teams import TEAMS_FILE
+from ..utils.scoring import (
+    DEFAULT_RULE_SET,
+    SESSIONS,
+    beat_all_teammates,
+    build_matchup_matrix,
+    build_teammates,
+    get_active_rule_set,
+)
+
+router = APIRouter()
+
+# Matchup matrices per race, stored with the cache key they were built from
+_matchup_cache = {}
+
+def get_matchup_points():
+    """Points per matchup win from the active rule set"""
+    return get_active_rule_set().get("matchup_points", DEFAULT_RULE_SET["matchup_points"])
+
+def read_positions_by_race():
+    """Group session positions by race: {race_id: {session: {driver_id: position}}}"""
+    positions_by_race = {}
+    for session, file_path in RESULTS_FILES.items():
+        for result in read_data(file_path):
+            race_positions = positions_by_race.setdefault(
+                result["race_id"], {s: {} for s in SESSIONS}
+            )
+            race_positions[session][result["driver_id"]] = result["position"]
+    return positions_by_race
+
+def matchup_cache_key(race_positions, teams, teammates, matchup_points):
+    """
+    Everything a race's matchups depend on.
+    Changes to other races' results leave this untouched, so their cache
+    entries stay valid.
+    """
+    return (
+        matchup_points,
+        tuple(
+            (session, tuple(sorted(race_positions[session].items())))
+            for session in SESSIONS
+        ),
+        tuple((team["id"], tuple(team["driver_ids"])) for team in teams),
+        tuple((d_id, tuple(ids)) for d_id, ids in sorted(teammates.items())),
+    )
+
+def compute_race_matchups(race_positions, teams, teammates, matchup_points):
+    """Build the team-vs-team matrix and teammate wins for every session of a race"""
+    sessions = {}
+    for session in SESSIONS:
+        positions = race_positions[session]
+        if not positions:
+            continue
+
+        matrix = build_matchup_matrix(teams, positions)
+        teammate_wins = {
+            team["id"]: sum(
+                1 for d_id in team["driver_ids"]
+                if d_id in positions
+                and beat_all_teammates(d_id, positions[d_id], teammates, positions)
+            )
+            for team in teams
+        }
+
+        sessions[session] = {
+            "matrix": {
+                team_id: {
+                    other_id: {"wins": wins, "points": wins * matchup_points}
+                    for other_id, wins in row.items()
+                }
+                for team_id, row in matrix.items()
+            },
+            "teammate_wins": teammate_wins,
+        }
+    return sessions
+
+def get_race_matchups(race_id, race_positions, teams, teammates, matchup_points):
+    """Get a race's matchups from the cache, rebuilding them if its results changed"""
+    cache_key = matchup_cache_key(race_positions, teams, teammates, matchup_points)
+    cached = _matchup_cache.get(race_id)
+    if cached and cached[0] == cache_key:
+        return cached[1]
+
+    sessions = compute_race_matchups(race_positions, teams, teammates, matchup_points)
+    _matchup_cache[race_id] = (cache_key, sessions)
+    return sessions
+
+@router.get("/matchups/race/{race_id}")
+async def get_race_matchups_endpoint(race_id: int):
+    """Get the head-to-head matchup matrix between all teams for each session of a race"""
+    positions_by_race = read_positions_by_race()
+    if race_id not in positions_by_race:
+        _matchup_cache.pop(race_id, None)
+        raise HTTPException(status_code=404, detail=f"No results found for race {race_id}")
+
+    teams = read_data(TEAMS_FILE)
+    teammates = build_teammates(read_data(DRIVERS_FILE))
+
+    return {
+        "race_id": race_id,
+        "sessions": get_race_matchups(
+            race_id, positions_by_race[race_id], teams, teammates, get_matchup_points()
+        ),
+    }
+
+@router.get("/matchups/season")
+async def get_season_matchups():
+    """Get season head-to-head matchup wins between all teams, per session type and in total"""
+    positions_by_race = read_positions_by_race()
+    teams = read_data(TEAMS_FILE)
+    teammates = build_teammates(read_data(DRIVERS_FILE))
+    matchup_points = get_matchup_points()
+
+    head_to_head = {
+        team["id"]: {
+            other["id"]: {**{session: 0 for session in SESSIONS}, "wins": 0, "points": 0}
+            for other in teams if other["id"] != team["id"]
+        }
+        for team in teams
+    }
+    teammate_wins = {team["id"]: {session: 0 for session in SESSIONS} for team in teams}
+
+    # Drop cached matrices of races that no longer have results
+    for race_id in list(_matchup_cache):
+        if race_id not in positions_by_race:
+            del _matchup_cache[race_id]
+
+    for race_id in sorted(positions_by_race):
+        sessions = get_race_matchups(
+            race_id, positions_by_race[race_id], teams, teammates, matchup_points
+        )
+        for session, session_matchups in sessions.items():
+            for team_id, row in session_matchups["matrix"].items():
+                for other_id, matchup in row.items():
+                    totals = head_to_head[team_id][other_id]
+                    totals[session] += matchup["wins"]
+                    totals["wins"] += matchup["wins"]
+                    totals["points"] += matchup["points"]
+            for team_id, wins in session_matchups["teammate_wins"].items():
+                teammate_wins[team_id][session] += wins
+
+    return {
+        "race_ids": sorted(positions_by_race),
+        "head_to_head": head_to_head,
+        "teammate_wins": teammate_wins,
+    }
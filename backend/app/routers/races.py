@@ -3,6 +3,8 @@ import json
 import os
 from typing import Dict, Any
 
+from ..utils.locks import locked_files
+
 router = APIRouter()
 
 # Path to the races data file
@@ -36,42 +38,45 @@ async def get_race(race_id: int):
     raise HTTPException(status_code=404, detail=f"Race with ID {race_id} not found")
 
 @router.post("/races")
-async def create_race(race: Dict[str, Any]):
+def create_race(race: Dict[str, Any]):
     """Create a new race"""
-    races = read_races()
+    with locked_files(RACES_FILE):
+        races = read_races()
     
-    # Assign a new ID (max existing ID + 1)
-    race_ids = [r["id"] for r in races]
-    race["id"] = max(race_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        race_ids = [r["id"] for r in races]
+        race["id"] = max(race_ids or [0]) + 1
     
-    races.append(race)
-    write_races(races)
-    return race
+        races.append(race)
+        write_races(races)
+        return race
 
 @router.put("/races/{race_id}")
-async def update_race(race_id: int, updated_race: Dict[str, Any]):
+def update_race(race_id: int, updated_race: Dict[str, Any]):
     """Update an existing race"""
-    races = read_races()
+    with locked_files(RACES_FILE):
+        races = read_races()
     
-    for i, race in enumerate(races):
-        if race["id"] == race_id:
-            # Preserve the original ID
-            updated_race["id"] = race_id
-            races[i] = updated_race
-            write_races(races)
-            return updated_race
+        for i, race in enumerate(races):
+            if race["id"] == race_id:
+                # Preserve the original ID
+                updated_race["id"] = race_id
+                races[i] = updated_race
+                write_races(races)
+                return updated_race
     
-    raise HTTPException(status_code=404, detail=f"Race with ID {race_id} not found")
+        raise HTTPException(status_code=404, detail=f"Race with ID {race_id} not found")
 
 @router.delete("/races/{race_id}")
-async def delete_race(race_id: int):
+def delete_race(race_id: int):
     """Delete a race"""
-    races = read_races()
+    with locked_files(RACES_FILE):
+        races = read_races()
     
-    for i, race in enumerate(races):
-        if race["id"] == race_id:
-            del races[i]
-            write_races(races)
-            return {"message": f"Race with ID {race_id} deleted"}
+        for i, race in enumerate(races):
+            if race["id"] == race_id:
+                del races[i]
+                write_races(races)
+                return {"message": f"Race with ID {race_id} deleted"}
     
-    raise HTTPException(status_code=404, detail=f"Race with ID {race_id} not found") 
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=f"Race with ID {race_id} not found") 
\ No newline at end of file
@@ -0,0 +1,184 @@
+from fastapi import APIRouter, HTTPException, Query
+import heapq
+import itertools
+import os
+from typing import Dict, List
+
+from .drivers import DRIVERS_FILE
+from .races import RACES_FILE
+from .results import read_data, RESULTS_FILES
+from .teams import TEAMS_FILE
+
+router = APIRouter()
+
+# Score vectors keyed by the modification times of the files they were built from
+_score_vector_cache = {}
+
+def _files_signature():
+    """Modification times of every file the score vectors depend on"""
+    signature = []
+    for file_path in list(RESULTS_FILES.values()) + [RACES_FILE]:
+        try:
+            signature.append(os.path.getmtime(file_path))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+def build_score_vectors():
+    """
+    Build a per-driver vector of fantasy points, one entry per race.
+    Points from all four results collections are summed per race, and
+    races are ordered chronologically. Only races with results are included.
+    """
+    signature = _files_signature()
+    cached = _score_vector_cache.get("vectors")
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    points_by_race: Dict[int, Dict[int, float]] = {}
+    for file_path in RESULTS_FILES.values():
+        for result in read_data(file_path):
+            race_points = points_by_race.setdefault(result["race_id"], {})
+            race_points[result["driver_id"]] = (
+                race_points.get(result["driver_id"], 0) + (result.get("fantasy_points") or 0)
+            )
+
+    # Order races by date, falling back to ID for races without a known date
+    race_dates = {race["id"]: race.get("date") or "" for race in read_data(RACES_FILE)}
+    race_ids = sorted(points_by_race, key=lambda race_id: (race_dates.get(race_id, ""), race_id))
+
+    vectors: Dict[int, List[float]] = {}
+    for index, race_id in enumerate(race_ids):
+        for driver_id, points in points_by_race[race_id].items():
+            vector = vectors.setdefault(driver_id, [0] * len(race_ids))
+            vector[index] = points
+
+    score_vectors = {"race_ids": race_ids, "vectors": vectors}
+    _score_vector_cache["vectors"] = (signature, score_vectors)
+    return score_vectors
+
+def project_driver_points(score_vectors, driver_ids, form_races):
+    """Project fantasy points for each driver as the average over the most recent races"""
+    window = min(form_races, len(score_vectors["race_ids"]))
+    projections = {}
+    for driver_id in driver_ids:
+        vector = score_vectors["vectors"].get(driver_id)
+        if not vector or window == 0:
+            projections[driver_id] = 0.0
+        else:
+            projections[driver_id] = sum(vector[-window:]) / window
+    return projections
+
+def search_transfers(roster, free_agents, max_swaps, limit):
+    """
+    Find the highest-gain swap sets of up to max_swaps drivers.
+
+    roster and free_agents are lists of (driver_id, projected_points). The search
+    keeps the best `limit` candidates in a min-heap and prunes any branch whose
+    optimistic bound cannot beat the current worst candidate. Free agents are
+    explored in descending order of projection, so once a branch is pruned every
+    later sibling can be skipped as well.
+    """
+    # A swap set can never be larger than the roster or the free agent pool
+    max_swaps = min(max_swaps, len(roster), len(free_agents))
+    roster = sorted(roster, key=lambda d: d[1])
+    free_agents = sorted(free_agents, key=lambda d: d[1], reverse=True)
+    agent_points = [points for _, points in free_agents]
+
+    # suffix_best[i][k] = best total of k free agents chosen from index i onwards
+    suffix_best = []
+    for i in range(len(free_agents) + 1):
+        suffix_best.append([sum(agent_points[i:i + k]) for k in range(max_swaps + 1)])
+
+    best = []  # min-heap of (gain, counter, outs, ins)
+    counter = itertools.count()
+
+    def threshold():
+        return best[0][0] if len(best) >= limit else 0
+
+    def explore(start, chosen, chosen_points, remaining, outs, out_points):
+        if remaining == 0:
+            gain = chosen_points - out_points
+            if gain > threshold():
+                entry = (gain, next(counter), outs, tuple(chosen))
+                if len(best) < limit:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+            return
+        for i in range(start, len(free_agents) - remaining + 1):
+            bound = chosen_points + suffix_best[i][remaining] - out_points
+            if bound <= threshold():
+                break
+            chosen.append(free_agents[i][0])
+            explore(i + 1, chosen, chosen_points + agent_points[i], remaining - 1, outs, out_points)
+            chosen.pop()
+
+    for swaps in range(1, max_swaps + 1):
+        # Cheapest roster drivers first so strong candidates fill the heap early
+        for out_combo in itertools.combinations(roster, swaps):
+            out_points = sum(points for _, points in out_combo)
+            if suffix_best[0][swaps] - out_points <= threshold():
+                continue
+            outs = tuple(driver_id for driver_id, _ in out_combo)
+            explore(0, [], 0, swaps, outs, out_points)
+
+    return sorted(best, key=lambda entry: (-entry[0], entry[1]))
+
+@router.get("/teams/{team_id}/transfer-recommendations")
+async def get_transfer_recommendations(
+    team_id: int,
+    max_swaps: int = Query(2, ge=1),
+    form_races: int = Query(3, ge=1),
+    limit: int = Query(10, ge=1, le=100),
+):
+    """Rank roster-out / free-agent-in swaps by projected fantasy points from recent form"""
+    teams = read_data(TEAMS_FILE)
+    drivers = read_data(DRIVERS_FILE)
+
+    team = None
+    for t in teams:
+        if t["id"] == team_id:
+            team = t
+            break
+
+    if not team:
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+
+    # Free agents are active drivers not on any team
+    assigned_driver_ids = set()
+    for t in teams:
+        assigned_driver_ids.update(t["driver_ids"])
+    free_agent_ids = [
+        d["id"] for d in drivers
+        if d["id"] not in assigned_driver_ids and d.get("is_active", True)
+    ]
+
+    score_vectors = build_score_vectors()
+    projections = project_driver_points(
+        score_vectors, list(team["driver_ids"]) + free_agent_ids, form_races
+    )
+
+    candidates = search_transfers(
+        [(d_id, projections[d_id]) for d_id in team["driver_ids"]],
+        [(d_id, projections[d_id]) for d_id in free_agent_ids],
+        max_swaps,
+        limit,
+    )
+
+    return {
+        "team_id": team_id,
+        "form_races": min(form_races, len(score_vectors["race_ids"])),
+        "projections": projections,
+        "recommendations": [
+            {
+                # Pairs match the parameters of the transfer endpoint
+                "swaps": [
+                    {"current_driver_id": out_id, "new_driver_id": in_id}
+                    for out_id, in_id in zip(outs, ins)
+                ],
+                "projected_gain": round(gain, 2),
+            }
+            for gain, _, outs, ins in candidates
+        ],
+    }
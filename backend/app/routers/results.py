@@ -3,6 +3,10 @@ import json
 import os
 from typing import Dict, Any, List
 
+from .drivers import DRIVERS_FILE
+from ..utils.locks import locked_files
+from ..utils.scoring import SESSIONS, build_teammates, get_active_rule_set, score_race_weekend
+
 router = APIRouter()
 
 # Paths to the results data files
@@ -11,6 +15,23 @@ SPRINT_RESULTS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "spr
 QUALIFYING_RESULTS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "qualifying_results.json")
 SPRINT_QUALIFYING_RESULTS_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "sprint_qualifying_results.json")
 
+# Results file for each session type
+RESULTS_FILES = {
+    "race": RACE_RESULTS_FILE,
+    "sprint": SPRINT_RESULTS_FILE,
+    "qualifying": QUALIFYING_RESULTS_FILE,
+    "sprint_qualifying": SPRINT_QUALIFYING_RESULTS_FILE,
+}
+
+def results_lock():
+    """
+    Hold the locks of all four results files.
+    A write to one session can rescore the others, so writers take them all.
+    Handlers that wait for it are plain functions, which FastAPI runs in its
+    threadpool, so a long rescoring apply does not block the event loop.
+    """
+    return locked_files(*RESULTS_FILES.values())
+
 # Helper functions to read and write data
 def read_data(file_path):
     """Read data from JSON file"""
@@ -25,6 +46,54 @@ def write_data(file_path, data):
     with open(file_path, "w") as f:
         json.dump(data, f, indent=2)
 
+def rescore_races(race_ids):
+    """
+    Recalculate fantasy points for every session of the given race weekends
+    with the active rule set. Every session is rescored, because a result in
+    one session can change points in another (e.g. qualifying sets the grid
+    for position gains). Call with results_lock() held.
+    Returns {session: {result_id: points}}.
+    """
+    race_ids = {race_id for race_id in race_ids if race_id is not None}
+    rule_set = get_active_rule_set()
+    teammates = build_teammates(read_data(DRIVERS_FILE))
+    results = {session: read_data(file_path) for session, file_path in RESULTS_FILES.items()}
+
+    scores = {session: {} for session in SESSIONS}
+    for race_id in race_ids:
+        weekend = {
+            session: [r for r in rows if r["race_id"] == race_id]
+            for session, rows in results.items()
+        }
+        race_scores = score_race_weekend(rule_set, weekend, teammates)
+        for session in SESSIONS:
+            scores[session].update(race_scores[session])
+
+    for session, rows in results.items():
+        changed = False
+        for result in rows:
+            points = scores[session].get(result["id"])
+            if points is not None and result.get("fantasy_points") != points:
+                result["fantasy_points"] = points
+                changed = True
+        if changed:
+            write_data(RESULTS_FILES[session], rows)
+
+    return scores
+
+def rescore_after_write(session, result, *race_ids):
+    """Rescore the races touched by a write and update the returned result's points"""
+    scores = rescore_races(race_ids)
+    if result["id"] in scores[session]:
+        result["fantasy_points"] = scores[session][result["id"]]
+
+def check_result_fields(result):
+    """Reject a result without the integer fields scoring depends on, before it is written"""
+    for field in ("race_id", "driver_id", "position"):
+        value = result.get(field)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise HTTPException(status_code=400, detail=f"Field '{field}' must be an integer")
+
 # Race Results Endpoints
 @router.get("/race-results")
 async def get_race_results():
@@ -39,55 +108,67 @@ async def get_race_results_by_race(race_id: int):
     return race_results
 
 @router.post("/race-results")
-async def create_race_result(result: Dict[str, Any]):
+def create_race_result(result: Dict[str, Any]):
     """Create a new race result"""
-    results = read_data(RACE_RESULTS_FILE)
+    check_result_fields(result)
+
+    with results_lock():
+        results = read_data(RACE_RESULTS_FILE)
     
-    # Check if a result for this driver in this race already exists
-    for existing_result in results:
-        if (existing_result["race_id"] == result["race_id"] and 
-            existing_result["driver_id"] == result["driver_id"]):
-            # Found a duplicate, return an error
-            raise HTTPException(
-                status_code=400,
-                detail=f"A race result for driver {result['driver_id']} in race {result['race_id']} already exists"
-            )
+        # Check if a result for this driver in this race already exists
+        for existing_result in results:
+            if (existing_result["race_id"] == result["race_id"] and 
+                existing_result["driver_id"] == result["driver_id"]):
+                # Found a duplicate, return an error
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"A race result for driver {result['driver_id']} in race {result['race_id']} already exists"
+                )
     
-    # Assign a new ID (max existing ID + 1)
-    result_ids = [r["id"] for r in results]
-    result["id"] = max(result_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        result_ids = [r["id"] for r in results]
+        result["id"] = max(result_ids or [0]) + 1
     
-    results.append(result)
-    write_data(RACE_RESULTS_FILE, results)
-    return result
+        results.append(result)
+        write_data(RACE_RESULTS_FILE, results)
+        rescore_after_write("race", result, result["race_id"])
+        return result
 
 @router.put("/race-results/{result_id}")
-async def update_race_result(result_id: int, updated_result: Dict[str, Any]):
+def update_race_result(result_id: int, updated_result: Dict[str, Any]):
     """Update an existing race result"""
-    results = read_data(RACE_RESULTS_FILE)
+    check_result_fields(updated_result)
+
+    with results_lock():
+        results = read_data(RACE_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            # Preserve the original ID
-            updated_result["id"] = result_id
-            results[i] = updated_result
-            write_data(RACE_RESULTS_FILE, results)
-            return updated_result
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                # Preserve the original ID
+                updated_result["id"] = result_id
+                results[i] = updated_result
+                write_data(RACE_RESULTS_FILE, results)
+                rescore_after_write(
+                    "race", updated_result, result["race_id"], updated_result.get("race_id")
+                )
+                return updated_result
     
-    raise HTTPException(status_code=404, detail=f"Race result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Race result with ID {result_id} not found")
 
 @router.delete("/race-results/{result_id}")
-async def delete_race_result(result_id: int):
+def delete_race_result(result_id: int):
     """Delete a race result"""
-    results = read_data(RACE_RESULTS_FILE)
+    with results_lock():
+        results = read_data(RACE_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            del results[i]
-            write_data(RACE_RESULTS_FILE, results)
-            return {"message": f"Race result with ID {result_id} deleted"}
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                del results[i]
+                write_data(RACE_RESULTS_FILE, results)
+                rescore_races([result["race_id"]])
+                return {"message": f"Race result with ID {result_id} deleted"}
     
-    raise HTTPException(status_code=404, detail=f"Race result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Race result with ID {result_id} not found")
 
 # Sprint Results Endpoints
 @router.get("/sprint-results")
@@ -103,55 +184,67 @@ async def get_sprint_results_by_race(race_id: int):
     return sprint_results
 
 @router.post("/sprint-results")
-async def create_sprint_result(result: Dict[str, Any]):
+def create_sprint_result(result: Dict[str, Any]):
     """Create a new sprint result"""
-    results = read_data(SPRINT_RESULTS_FILE)
+    check_result_fields(result)
+
+    with results_lock():
+        results = read_data(SPRINT_RESULTS_FILE)
     
-    # Check if a result for this driver in this race already exists
-    for existing_result in results:
-        if (existing_result["race_id"] == result["race_id"] and 
-            existing_result["driver_id"] == result["driver_id"]):
-            # Found a duplicate, return an error
-            raise HTTPException(
-                status_code=400,
-                detail=f"A sprint result for driver {result['driver_id']} in race {result['race_id']} already exists"
-            )
+        # Check if a result for this driver in this race already exists
+        for existing_result in results:
+            if (existing_result["race_id"] == result["race_id"] and 
+                existing_result["driver_id"] == result["driver_id"]):
+                # Found a duplicate, return an error
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"A sprint result for driver {result['driver_id']} in race {result['race_id']} already exists"
+                )
     
-    # Assign a new ID (max existing ID + 1)
-    result_ids = [r["id"] for r in results]
-    result["id"] = max(result_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        result_ids = [r["id"] for r in results]
+        result["id"] = max(result_ids or [0]) + 1
     
-    results.append(result)
-    write_data(SPRINT_RESULTS_FILE, results)
-    return result
+        results.append(result)
+        write_data(SPRINT_RESULTS_FILE, results)
+        rescore_after_write("sprint", result, result["race_id"])
+        return result
 
 @router.put("/sprint-results/{result_id}")
-async def update_sprint_result(result_id: int, updated_result: Dict[str, Any]):
+def update_sprint_result(result_id: int, updated_result: Dict[str, Any]):
     """Update an existing sprint result"""
-    results = read_data(SPRINT_RESULTS_FILE)
+    check_result_fields(updated_result)
+
+    with results_lock():
+        results = read_data(SPRINT_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            # Preserve the original ID
-            updated_result["id"] = result_id
-            results[i] = updated_result
-            write_data(SPRINT_RESULTS_FILE, results)
-            return updated_result
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                # Preserve the original ID
+                updated_result["id"] = result_id
+                results[i] = updated_result
+                write_data(SPRINT_RESULTS_FILE, results)
+                rescore_after_write(
+                    "sprint", updated_result, result["race_id"], updated_result.get("race_id")
+                )
+                return updated_result
     
-    raise HTTPException(status_code=404, detail=f"Sprint result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Sprint result with ID {result_id} not found")
 
 @router.delete("/sprint-results/{result_id}")
-async def delete_sprint_result(result_id: int):
+def delete_sprint_result(result_id: int):
     """Delete a sprint result"""
-    results = read_data(SPRINT_RESULTS_FILE)
+    with results_lock():
+        results = read_data(SPRINT_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            del results[i]
-            write_data(SPRINT_RESULTS_FILE, results)
-            return {"message": f"Sprint result with ID {result_id} deleted"}
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                del results[i]
+                write_data(SPRINT_RESULTS_FILE, results)
+                rescore_races([result["race_id"]])
+                return {"message": f"Sprint result with ID {result_id} deleted"}
     
-    raise HTTPException(status_code=404, detail=f"Sprint result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Sprint result with ID {result_id} not found")
 
 # Qualifying Results Endpoints
 @router.get("/qualifying-results")
@@ -167,55 +260,67 @@ async def get_qualifying_results_by_race(race_id: int):
     return qualifying_results
 
 @router.post("/qualifying-results")
-async def create_qualifying_result(result: Dict[str, Any]):
+def create_qualifying_result(result: Dict[str, Any]):
     """Create a new qualifying result"""
-    results = read_data(QUALIFYING_RESULTS_FILE)
+    check_result_fields(result)
+
+    with results_lock():
+        results = read_data(QUALIFYING_RESULTS_FILE)
     
-    # Check if a result for this driver in this race already exists
-    for existing_result in results:
-        if (existing_result["race_id"] == result["race_id"] and 
-            existing_result["driver_id"] == result["driver_id"]):
-            # Found a duplicate, return an error
-            raise HTTPException(
-                status_code=400,
-                detail=f"A qualifying result for driver {result['driver_id']} in race {result['race_id']} already exists"
-            )
+        # Check if a result for this driver in this race already exists
+        for existing_result in results:
+            if (existing_result["race_id"] == result["race_id"] and 
+                existing_result["driver_id"] == result["driver_id"]):
+                # Found a duplicate, return an error
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"A qualifying result for driver {result['driver_id']} in race {result['race_id']} already exists"
+                )
     
-    # Assign a new ID (max existing ID + 1)
-    result_ids = [r["id"] for r in results]
-    result["id"] = max(result_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        result_ids = [r["id"] for r in results]
+        result["id"] = max(result_ids or [0]) + 1
     
-    results.append(result)
-    write_data(QUALIFYING_RESULTS_FILE, results)
-    return result
+        results.append(result)
+        write_data(QUALIFYING_RESULTS_FILE, results)
+        rescore_after_write("qualifying", result, result["race_id"])
+        return result
 
 @router.put("/qualifying-results/{result_id}")
-async def update_qualifying_result(result_id: int, updated_result: Dict[str, Any]):
+def update_qualifying_result(result_id: int, updated_result: Dict[str, Any]):
     """Update an existing qualifying result"""
-    results = read_data(QUALIFYING_RESULTS_FILE)
+    check_result_fields(updated_result)
+
+    with results_lock():
+        results = read_data(QUALIFYING_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            # Preserve the original ID
-            updated_result["id"] = result_id
-            results[i] = updated_result
-            write_data(QUALIFYING_RESULTS_FILE, results)
-            return updated_result
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                # Preserve the original ID
+                updated_result["id"] = result_id
+                results[i] = updated_result
+                write_data(QUALIFYING_RESULTS_FILE, results)
+                rescore_after_write(
+                    "qualifying", updated_result, result["race_id"], updated_result.get("race_id")
+                )
+                return updated_result
     
-    raise HTTPException(status_code=404, detail=f"Qualifying result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Qualifying result with ID {result_id} not found")
 
 @router.delete("/qualifying-results/{result_id}")
-async def delete_qualifying_result(result_id: int):
+def delete_qualifying_result(result_id: int):
     """Delete a qualifying result"""
-    results = read_data(QUALIFYING_RESULTS_FILE)
+    with results_lock():
+        results = read_data(QUALIFYING_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            del results[i]
-            write_data(QUALIFYING_RESULTS_FILE, results)
-            return {"message": f"Qualifying result with ID {result_id} deleted"}
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                del results[i]
+                write_data(QUALIFYING_RESULTS_FILE, results)
+                rescore_races([result["race_id"]])
+                return {"message": f"Qualifying result with ID {result_id} deleted"}
     
-    raise HTTPException(status_code=404, detail=f"Qualifying result with ID {result_id} not found")
+        raise HTTPException(status_code=404, detail=f"Qualifying result with ID {result_id} not found")
 
 # Sprint Qualifying Results Endpoints
 @router.get("/sprint-qualifying-results")
@@ -231,58 +336,70 @@ async def get_sprint_qualifying_results_by_race(race_id: int):
     return sprint_qualifying_results
 
 @router.post("/sprint-qualifying-results")
-async def create_sprint_qualifying_result(result: Dict[str, Any]):
+def create_sprint_qualifying_result(result: Dict[str, Any]):
     """Create a new sprint qualifying result"""
-    results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
+    check_result_fields(result)
+
+    with results_lock():
+        results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
     
-    # Check if a result for this driver in this race already exists
-    for existing_result in results:
-        if (existing_result["race_id"] == result["race_id"] and 
-            existing_result["driver_id"] == result["driver_id"]):
-            # Found a duplicate, return an error
-            raise HTTPException(
-                status_code=400,
-                detail=f"A sprint qualifying result for driver {result['driver_id']} in race {result['race_id']} already exists"
-            )
+        # Check if a result for this driver in this race already exists
+        for existing_result in results:
+            if (existing_result["race_id"] == result["race_id"] and 
+                existing_result["driver_id"] == result["driver_id"]):
+                # Found a duplicate, return an error
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"A sprint qualifying result for driver {result['driver_id']} in race {result['race_id']} already exists"
+                )
     
-    # Assign a new ID (max existing ID + 1)
-    result_ids = [r["id"] for r in results]
-    result["id"] = max(result_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        result_ids = [r["id"] for r in results]
+        result["id"] = max(result_ids or [0]) + 1
     
-    results.append(result)
-    write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
-    return result
+        results.append(result)
+        write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
+        rescore_after_write("sprint_qualifying", result, result["race_id"])
+        return result
 
 @router.put("/sprint-qualifying-results/{result_id}")
-async def update_sprint_qualifying_result(result_id: int, updated_result: Dict[str, Any]):
+def update_sprint_qualifying_result(result_id: int, updated_result: Dict[str, Any]):
     """Update an existing sprint qualifying result"""
-    results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
+    check_result_fields(updated_result)
+
+    with results_lock():
+        results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            # Preserve the original ID
-            updated_result["id"] = result_id
-            results[i] = updated_result
-            write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
-            return updated_result
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                # Preserve the original ID
+                updated_result["id"] = result_id
+                results[i] = updated_result
+                write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
+                rescore_after_write(
+                    "sprint_qualifying", updated_result, result["race_id"], updated_result.get("race_id")
+                )
+                return updated_result
     
-    raise HTTPException(
-        status_code=404, 
-        detail=f"Sprint qualifying result with ID {result_id} not found"
-    )
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Sprint qualifying result with ID {result_id} not found"
+        )
 
 @router.delete("/sprint-qualifying-results/{result_id}")
-async def delete_sprint_qualifying_result(result_id: int):
+def delete_sprint_qualifying_result(result_id: int):
     """Delete a sprint qualifying result"""
-    results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
+    with results_lock():
+        results = read_data(SPRINT_QUALIFYING_RESULTS_FILE)
     
-    for i, result in enumerate(results):
-        if result["id"] == result_id:
-            del results[i]
-            write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
-            return {"message": f"Sprint qualifying result with ID {result_id} deleted"}
+        for i, result in enumerate(results):
+            if result["id"] == result_id:
+                del results[i]
+                write_data(SPRINT_QUALIFYING_RESULTS_FILE, results)
+                rescore_races([result["race_id"]])
+                return {"message": f"Sprint qualifying result with ID {result_id} deleted"}
     
-    raise HTTPException(
-        status_code=404, 
-        detail=f"Sprint qualifying result with ID {result_id} not found"
-    ) 
\ No newline at end of file
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Sprint qualifying result with ID {result_id} not found"
+        ) 
\ No newline at end of file
@@ -0,0 +1,352 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+import json
+import multiprocessing
+import os
+import threading
+from typing import Dict, Any
+
+from .drivers import DRIVERS_FILE
+from .results import read_data, write_data, RESULTS_FILES
+from ..utils.locks import locked_files
+from ..utils.scoring import (
+    DEFAULT_RULE_SET,
+    POINTS_TABLES,
+    SCORING_RULES_FILE,
+    SESSIONS,
+    build_teammates,
+    get_active_rule_set,
+    race_fingerprint,
+    read_rule_sets,
+    score_race_weekend,
+    score_races,
+)
+
+router = APIRouter()
+
+# Paths to the data files
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+RESCORING_JOBS_FILE = os.path.join(DATA_DIR, "rescoring_jobs.json")
+RESCORING_STAGING_DIR = os.path.join(DATA_DIR, "rescoring")
+
+# Bounds for rescoring job parameters; each worker is a separate process
+MAX_CHUNK_SIZE = 1000
+MAX_RESCORING_WORKERS = os.cpu_count() or 1
+
+# Guards the jobs file, which is updated from background jobs and requests
+_jobs_lock = threading.Lock()
+# IDs of jobs currently running in this process
+_running_jobs = set()
+
+def now():
+    """Current UTC time as an ISO string"""
+    return datetime.now(timezone.utc).isoformat()
+
+def find_rule_set(rule_sets, rule_set_id):
+    """Find a scoring rule set by ID"""
+    for rule_set in rule_sets:
+        if rule_set["id"] == rule_set_id:
+            return rule_set
+    raise HTTPException(status_code=404, detail=f"Scoring rule set with ID {rule_set_id} not found")
+
+def find_job(jobs, job_id):
+    """Find a rescoring job by ID"""
+    for job in jobs:
+        if job["id"] == job_id:
+            return job
+    raise HTTPException(status_code=404, detail=f"Rescoring job with ID {job_id} not found")
+
+def update_job(job_id, **changes):
+    """Apply changes to a stored rescoring job and return the updated job"""
+    with _jobs_lock:
+        jobs = read_data(RESCORING_JOBS_FILE)
+        job = find_job(jobs, job_id)
+        job.update(changes)
+        job["updated_at"] = now()
+        write_data(RESCORING_JOBS_FILE, jobs)
+        return dict(job)
+
+def staging_file(job_id):
+    """Path of the file holding scores already computed by a job"""
+    return os.path.join(RESCORING_STAGING_DIR, f"job_{job_id}.ndjson")
+
+def read_staged_chunks(job_id):
+    """
+    Read the scores staged by a job, one line per completed chunk.
+    A partially written last line (from an interrupted job) is ignored.
+    """
+    chunks = []
+    try:
+        with open(staging_file(job_id), "r") as f:
+            for line in f:
+                try:
+                    chunks.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+    except FileNotFoundError:
+        pass
+    return chunks
+
+def apply_scores(staged, rule_set, teammates):
+    """
+    Write rescored fantasy points to all results collections.
+
+    The results are re-read with the results and rule set files locked, so
+    writes made while the job was running are kept. Races whose results
+    changed since they were staged (or that were added since) are rescored on
+    the spot. The rule set is activated before the locks are released, so
+    results entered afterwards are scored with it too.
+    """
+    # Merge all staged chunks; JSON turns the race and result IDs into strings
+    fingerprints = {}
+    scores = {session: {} for session in SESSIONS}
+    for chunk in staged:
+        fingerprints.update({int(race_id): fp for race_id, fp in chunk["races"].items()})
+        for session in SESSIONS:
+            scores[session].update(
+                {int(result_id): points for result_id, points in chunk["scores"][session].items()}
+            )
+
+    with locked_files(SCORING_RULES_FILE, *RESULTS_FILES.values()):
+        results = {session: read_data(file_path) for session, file_path in RESULTS_FILES.items()}
+
+        results_by_race = {}
+        for session, rows in results.items():
+            for result in rows:
+                race_results = results_by_race.setdefault(
+                    result["race_id"], {s: [] for s in SESSIONS}
+                )
+                race_results[session].append(result)
+
+        for race_id, session_results in results_by_race.items():
+            if fingerprints.get(race_id) != race_fingerprint(session_results):
+                race_scores = score_race_weekend(rule_set, session_results, teammates)
+                for session in SESSIONS:
+                    scores[session].update(race_scores[session])
+
+        temp_files = []
+        updated = 0
+        for session, rows in results.items():
+            for result in rows:
+                points = scores[session].get(result["id"])
+                if points is not None and result.get("fantasy_points") != points:
+                    result["fantasy_points"] = points
+                    updated += 1
+            temp_file = f"{RESULTS_FILES[session]}.tmp"
+            write_data(temp_file, rows)
+            temp_files.append((temp_file, RESULTS_FILES[session]))
+
+        for temp_file, file_path in temp_files:
+            os.replace(temp_file, file_path)
+
+        # Mark the applied rule set as the active one
+        rule_sets = read_rule_sets()
+        for r in rule_sets:
+            r["is_active"] = r["id"] == rule_set["id"]
+        write_data(SCORING_RULES_FILE, rule_sets)
+
+    return updated
+
+def run_rescoring_job(job_id):
+    """Rescore all results for a job, resuming from any chunks already staged"""
+    try:
+        with _jobs_lock:
+            job = dict(find_job(read_data(RESCORING_JOBS_FILE), job_id))
+        rule_set = find_rule_set(read_rule_sets(), job["rule_set_id"])
+        teammates = build_teammates(read_data(DRIVERS_FILE))
+
+        # Group every result by race so each weekend is scored together
+        results_by_race = {}
+        for session, file_path in RESULTS_FILES.items():
+            for result in read_data(file_path):
+                race_results = results_by_race.setdefault(
+                    result["race_id"], {s: [] for s in SESSIONS}
+                )
+                race_results[session].append(result)
+
+        staged = read_staged_chunks(job_id)
+        done_race_ids = {int(race_id) for chunk in staged for race_id in chunk["races"]}
+        pending = sorted(race_id for race_id in results_by_race if race_id not in done_race_ids)
+        chunks = [
+            pending[i:i + job["chunk_size"]]
+            for i in range(0, len(pending), job["chunk_size"])
+        ]
+
+        update_job(
+            job_id,
+            status="running",
+            total_races=len(results_by_race),
+            processed_races=len(results_by_race) - len(pending),
+            error=None,
+        )
+
+        # Rewrite the staged chunks to drop any partially written line
+        os.makedirs(RESCORING_STAGING_DIR, exist_ok=True)
+        with open(staging_file(job_id), "w") as staging:
+            for chunk in staged:
+                staging.write(json.dumps(chunk) + "\n")
+
+        processed = len(results_by_race) - len(pending)
+        # Chunks are scored in worker processes; each is sent only its own races.
+        # Spawned workers avoid forking a process that is running threads.
+        with ProcessPoolExecutor(
+            max_workers=job["workers"], mp_context=multiprocessing.get_context("spawn")
+        ) as executor, open(staging_file(job_id), "a") as staging:
+            futures = [
+                executor.submit(
+                    score_races,
+                    rule_set,
+                    {race_id: results_by_race[race_id] for race_id in chunk},
+                    teammates,
+                )
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                chunk_scores = future.result()
+                staging.write(json.dumps(chunk_scores) + "\n")
+                staging.flush()
+                processed += len(chunk_scores["races"])
+                update_job(job_id, processed_races=processed)
+
+        updated = apply_scores(read_staged_chunks(job_id), rule_set, teammates)
+        update_job(job_id, status="completed", updated_results=updated, completed_at=now())
+        os.remove(staging_file(job_id))
+    except Exception as e:
+        update_job(job_id, status="failed", error=str(e))
+    finally:
+        _running_jobs.discard(job_id)
+
+def validate_rule_set(rule_set):
+    """Check the rules given for a new rule set, raising a 400 for invalid input"""
+    if "id" in rule_set or "is_active" in rule_set:
+        raise HTTPException(
+            status_code=400,
+            detail="id and is_active are assigned by the server and cannot be set"
+        )
+
+    unknown_rules = set(rule_set) - set(DEFAULT_RULE_SET)
+    if unknown_rules:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown scoring rules: {', '.join(sorted(unknown_rules))}"
+        )
+
+    for rule, value in rule_set.items():
+        if rule == "name":
+            valid = isinstance(value, str)
+            expected = "a string"
+        elif rule in POINTS_TABLES.values():
+            valid = isinstance(value, list) and all(
+                isinstance(points, int) and not isinstance(points, bool) for points in value
+            )
+            expected = "a list of integers"
+        else:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+            expected = "a number"
+        if not valid:
+            raise HTTPException(status_code=400, detail=f"Scoring rule '{rule}' must be {expected}")
+
+# Scoring Rule Set Endpoints
+@router.get("/scoring-rules")
+async def get_scoring_rules():
+    """Get all scoring rule set versions"""
+    return read_rule_sets()
+
+@router.get("/scoring-rules/active")
+async def get_active_scoring_rules():
+    """Get the scoring rule set currently applied to stored results"""
+    return get_active_rule_set()
+
+@router.get("/scoring-rules/{rule_set_id}")
+async def get_scoring_rule_set(rule_set_id: int):
+    """Get a specific scoring rule set version"""
+    return find_rule_set(read_rule_sets(), rule_set_id)
+
+@router.post("/scoring-rules")
+def create_scoring_rule_set(rule_set: Dict[str, Any]):
+    """
+    Create a new scoring rule set version.
+    Rules not given are copied from the active rule set. Rule sets are never
+    edited in place; run a rescoring job to apply a new version.
+    """
+    validate_rule_set(rule_set)
+
+    with locked_files(SCORING_RULES_FILE):
+        rule_sets = read_rule_sets()
+        new_rule_set = dict(get_active_rule_set())
+        new_rule_set.update(rule_set)
+
+        # Assign a new version (max existing ID + 1)
+        rule_set_ids = [r["id"] for r in rule_sets]
+        new_rule_set["id"] = max(rule_set_ids or [0]) + 1
+        new_rule_set["is_active"] = False
+        new_rule_set["created_at"] = now()
+
+        rule_sets.append(new_rule_set)
+        write_data(SCORING_RULES_FILE, rule_sets)
+        return new_rule_set
+
+# Rescoring Job Endpoints
+@router.get("/rescoring-jobs")
+async def get_rescoring_jobs():
+    """Get all rescoring jobs"""
+    return read_data(RESCORING_JOBS_FILE)
+
+@router.get("/rescoring-jobs/{job_id}")
+async def get_rescoring_job(job_id: int):
+    """Get a rescoring job and its progress"""
+    return find_job(read_data(RESCORING_JOBS_FILE), job_id)
+
+@router.post("/rescoring-jobs")
+def create_rescoring_job(
+    background_tasks: BackgroundTasks,
+    rule_set_id: int,
+    chunk_size: int = Query(10, ge=1, le=MAX_CHUNK_SIZE),
+    workers: int = Query(min(4, MAX_RESCORING_WORKERS), ge=1, le=MAX_RESCORING_WORKERS),
+):
+    """Start a background job recomputing fantasy points for all results with a rule set"""
+    find_rule_set(read_rule_sets(), rule_set_id)
+
+    with _jobs_lock:
+        jobs = read_data(RESCORING_JOBS_FILE)
+        if _running_jobs:
+            raise HTTPException(status_code=409, detail="A rescoring job is already in progress")
+
+        # Assign a new ID (max existing ID + 1)
+        job_ids = [j["id"] for j in jobs]
+        job = {
+            "id": max(job_ids or [0]) + 1,
+            "rule_set_id": rule_set_id,
+            "status": "queued",
+            "chunk_size": chunk_size,
+            "workers": workers,
+            "total_races": 0,
+            "processed_races": 0,
+            "updated_results": 0,
+            "error": None,
+            "created_at": now(),
+            "updated_at": now(),
+        }
+        jobs.append(job)
+        write_data(RESCORING_JOBS_FILE, jobs)
+        _running_jobs.add(job["id"])
+
+    background_tasks.add_task(run_rescoring_job, job["id"])
+    return job
+
+@router.post("/rescoring-jobs/{job_id}/resume")
+def resume_rescoring_job(job_id: int, background_tasks: BackgroundTasks):
+    """Resume an interrupted or failed rescoring job from its last completed chunk"""
+    with _jobs_lock:
+        job = find_job(read_data(RESCORING_JOBS_FILE), job_id)
+
+        if job["status"] == "completed":
+            raise HTTPException(status_code=400, detail=f"Rescoring job {job_id} is already completed")
+        # Only one job may run at a time, or each would activate its own rule set
+        if _running_jobs:
+            raise HTTPException(status_code=409, detail="A rescoring job is already in progress")
+        _running_jobs.add(job_id)
+
+    background_tasks.add_task(run_rescoring_job, job_id)
+    return update_job(job_id, status="queued")
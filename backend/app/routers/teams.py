@@ -3,6 +3,8 @@ import json
 import os
 from typing import List, Dict, Any
 
+from ..utils.locks import locked_files
+
 router = APIRouter()
 
 # Path to the teams data file
@@ -37,42 +39,45 @@ async def get_team(team_id: int):
     raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
 
 @router.post("/teams")
-async def create_team(team: Dict[str, Any]):
+def create_team(team: Dict[str, Any]):
     """Create a new team"""
-    teams = read_teams()
+    with locked_files(TEAMS_FILE):
+        teams = read_teams()
     
-    # Assign a new ID (max existing ID + 1)
-    team_ids = [t["id"] for t in teams]
-    team["id"] = max(team_ids or [0]) + 1
+        # Assign a new ID (max existing ID + 1)
+        team_ids = [t["id"] for t in teams]
+        team["id"] = max(team_ids or [0]) + 1
     
-    teams.append(team)
-    write_teams(teams)
-    return team
+        teams.append(team)
+        write_teams(teams)
+        return team
 
 @router.put("/teams/{team_id}")
-async def update_team(team_id: int, updated_team: Dict[str, Any]):
+def update_team(team_id: int, updated_team: Dict[str, Any]):
     """Update an existing team"""
-    teams = read_teams()
+    with locked_files(TEAMS_FILE):
+        teams = read_teams()
     
-    for i, team in enumerate(teams):
-        if team["id"] == team_id:
-            # Preserve the original ID
-            updated_team["id"] = team_id
-            teams[i] = updated_team
-            write_teams(teams)
-            return updated_team
+        for i, team in enumerate(teams):
+            if team["id"] == team_id:
+                # Preserve the original ID
+                updated_team["id"] = team_id
+                teams[i] = updated_team
+                write_teams(teams)
+                return updated_team
     
-    raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found")
 
 @router.delete("/teams/{team_id}")
-async def delete_team(team_id: int):
+def delete_team(team_id: int):
     """Delete a team"""
-    teams = read_teams()
+    with locked_files(TEAMS_FILE):
+        teams = read_teams()
     
-    for i, team in enumerate(teams):
-        if team["id"] == team_id:
-            del teams[i]
-            write_teams(teams)
-            return {"message": f"Team with ID {team_id} deleted"}
+        for i, team in enumerate(teams):
+            if team["id"] == team_id:
+                del teams[i]
+                write_teams(teams)
+                return {"message": f"Team with ID {team_id} deleted"}
     
-    raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found") 
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=f"Team with ID {team_id} not found") 
\ No newline at end of file
@@ -0,0 +1,617 @@
+"""
+Streaming bulk import and export of data collections as NDJSON or CSV.
+
+Collections are read and written one record at a time, so memory use does
+not grow with the size of a season. Only the keys needed to reject
+duplicates are kept while importing.
+
+Usage:
+    python -m app.utils.bulk_io export <collection|all> [-f ndjson|csv] [-o FILE]
+    python -m app.utils.bulk_io import <collection|all> FILE [-f ndjson|csv] [--on-conflict error|skip]
+
+The "all" collection uses NDJSON where every line has a "collection" field.
+Imported results without fantasy_points are scored with the active rule set.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+
+from .locks import file_lock, locked_files
+from .scoring import SESSIONS, build_teammates, get_active_rule_set, score_race_weekend
+
+# Define file paths
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+
+# Field types for each collection, in CSV column order
+RESULT_FIELDS = {
+    "id": "int",
+    "race_id": "int",
+    "driver_id": "int",
+    "position": "int",
+    "fantasy_points": "number",
+}
+
+COLLECTIONS = {
+    "drivers": {
+        "file": os.path.join(DATA_DIR, "drivers.json"),
+        "fields": {
+            "id": "int",
+            "name": "str",
+            "number": "int",
+            "constructor": "str",
+            "is_active": "bool",
+        },
+        "required": ["name"],
+    },
+    "teams": {
+        "file": os.path.join(DATA_DIR, "teams.json"),
+        "fields": {"id": "int", "name": "str", "owner": "str", "driver_ids": "int_list"},
+        "required": ["name", "driver_ids"],
+    },
+    "races": {
+        "file": os.path.join(DATA_DIR, "races.json"),
+        "fields": {
+            "id": "int",
+            "name": "str",
+            "track": "str",
+            "date": "str",
+            "has_sprint": "bool",
+        },
+        "required": ["name"],
+    },
+    "race_results": {
+        "file": os.path.join(DATA_DIR, "race_results.json"),
+        "fields": {
+            **RESULT_FIELDS,
+            "fastest_lap": "bool",
+            "finished": "bool",
+        },
+        "required": ["race_id", "driver_id", "position"],
+        "unique": ("race_id", "driver_id"),
+    },
+    "sprint_results": {
+        "file": os.path.join(DATA_DIR, "sprint_results.json"),
+        "fields": dict(RESULT_FIELDS),
+        "required": ["race_id", "driver_id", "position"],
+        "unique": ("race_id", "driver_id"),
+    },
+    "qualifying_results": {
+        "file": os.path.join(DATA_DIR, "qualifying_results.json"),
+        "fields": dict(RESULT_FIELDS),
+        "required": ["race_id", "driver_id", "position"],
+        "unique": ("race_id", "driver_id"),
+    },
+    "sprint_qualifying_results": {
+        "file": os.path.join(DATA_DIR, "sprint_qualifying_results.json"),
+        "fields": dict(RESULT_FIELDS),
+        "required": ["race_id", "driver_id", "position"],
+        "unique": ("race_id", "driver_id"),
+    },
+}
+
+FORMATS = ["ndjson", "csv"]
+
+# Session type of each results collection
+RESULT_SESSIONS = {
+    "race_results": "race",
+    "sprint_results": "sprint",
+    "qualifying_results": "qualifying",
+    "sprint_qualifying_results": "sprint_qualifying",
+}
+
+
+class BulkDataError(ValueError):
+    """Raised when an imported record is invalid or conflicts with existing data"""
+
+def iter_json_array(file_path, chunk_size=65536):
+    """
+    Yield the items of a JSON array file one at a time.
+    Only the item being decoded is held in memory, never the whole array.
+    """
+    decoder = json.JSONDecoder()
+    try:
+        f = open(file_path, "r")
+    except FileNotFoundError:
+        return
+
+    with f:
+        buffer = ""
+        eof = False
+        started = False
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            stripped = buffer.lstrip()
+            if not started and stripped.startswith("["):
+                stripped = stripped[1:].lstrip()
+                started = True
+            if started and stripped.startswith(","):
+                stripped = stripped[1:].lstrip()
+            buffer = stripped
+
+            if buffer.startswith("]"):
+                return
+            if buffer and started:
+                try:
+                    item, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # An item ending exactly at the buffer end may be incomplete
+                    if end < len(buffer) or eof:
+                        yield item
+                        buffer = buffer[end:]
+                        continue
+
+            if eof:
+                if buffer.strip():
+                    raise json.JSONDecodeError("Unexpected end of JSON array", buffer, 0)
+                return
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buffer += chunk
+
+class JsonArrayWriter:
+    """Write a JSON array one item at a time, formatted like json.dump(..., indent=2)"""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, item):
+        separator = ",\n" if self.count else "[\n"
+        body = json.dumps(item, indent=2).replace("\n", "\n  ")
+        self.f.write(f"{separator}  {body}")
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]" if self.count else "[]")
+
+def coerce_value(value, field_type, field):
+    """Convert a raw NDJSON or CSV value to the field's type"""
+    if field_type == "int":
+        if isinstance(value, bool):
+            raise BulkDataError(f"Field '{field}' must be an integer")
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise BulkDataError(f"Field '{field}' must be an integer, got {value!r}")
+            return int(value)
+        if isinstance(value, str):
+            value = value.strip()
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise BulkDataError(f"Field '{field}' must be an integer, got {value!r}")
+    if field_type == "number":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return value
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise BulkDataError(f"Field '{field}' must be a number, got {value!r}")
+        return int(number) if number.is_integer() else number
+    if field_type == "bool":
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.strip().lower() in ("true", "1", "yes"):
+            return True
+        if isinstance(value, str) and value.strip().lower() in ("false", "0", "no"):
+            return False
+        raise BulkDataError(f"Field '{field}' must be a boolean, got {value!r}")
+    if field_type == "int_list":
+        if isinstance(value, str):
+            value = [v for v in value.replace(",", ";").split(";") if v.strip()]
+        if not isinstance(value, list):
+            raise BulkDataError(f"Field '{field}' must be a list of integers")
+        return [coerce_value(v, "int", field) for v in value]
+    if not isinstance(value, str):
+        raise BulkDataError(f"Field '{field}' must be a string, got {value!r}")
+    return value
+
+def validate_record(collection, record):
+    """Check a record against its collection schema and return it with typed fields"""
+    if not isinstance(record, dict):
+        raise BulkDataError("Each record must be an object")
+
+    schema = COLLECTIONS[collection]
+    validated = {}
+    for field, value in record.items():
+        # CSV cells past the header have no field name
+        if field is None:
+            raise BulkDataError("Row has more cells than the header")
+        if field not in schema["fields"]:
+            raise BulkDataError(f"Unknown field '{field}'")
+        # Empty CSV cells mean the field was not given
+        if value is None or value == "":
+            continue
+        validated[field] = coerce_value(value, schema["fields"][field], field)
+
+    missing = [field for field in schema["required"] if field not in validated]
+    if missing:
+        raise BulkDataError(f"Missing required fields: {', '.join(missing)}")
+    return validated
+
+def format_csv_value(value):
+    """Format a field value for a CSV cell"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return ";".join(str(v) for v in value)
+    return value
+
+class ReferenceIndex:
+    """
+    IDs that imported records may refer to.
+    Each collection is indexed from disk the first time it is needed, and
+    records imported in the same run are added as they are written.
+    """
+
+    def __init__(self):
+        self._driver_ids = None
+        self._race_ids = None
+        self._assigned_driver_ids = None
+
+    def driver_ids(self):
+        if self._driver_ids is None:
+            self._driver_ids = {d["id"] for d in iter_json_array(COLLECTIONS["drivers"]["file"])}
+        return self._driver_ids
+
+    def race_ids(self):
+        if self._race_ids is None:
+            self._race_ids = {r["id"] for r in iter_json_array(COLLECTIONS["races"]["file"])}
+        return self._race_ids
+
+    def assigned_driver_ids(self):
+        if self._assigned_driver_ids is None:
+            self._assigned_driver_ids = set()
+            for team in iter_json_array(COLLECTIONS["teams"]["file"]):
+                self._assigned_driver_ids.update(team.get("driver_ids", []))
+        return self._assigned_driver_ids
+
+    def check(self, collection, record):
+        """Reject records that refer to missing races or drivers, or reuse assigned drivers"""
+        if collection in RESULT_SESSIONS:
+            if record["race_id"] not in self.race_ids():
+                raise BulkDataError(f"Race with ID {record['race_id']} not found")
+            if record["driver_id"] not in self.driver_ids():
+                raise BulkDataError(f"Driver with ID {record['driver_id']} not found")
+        elif collection == "teams":
+            driver_ids = record["driver_ids"]
+            if len(set(driver_ids)) != len(driver_ids):
+                raise BulkDataError("A team cannot list the same driver twice")
+            for driver_id in driver_ids:
+                if driver_id not in self.driver_ids():
+                    raise BulkDataError(f"Driver with ID {driver_id} not found")
+                if driver_id in self.assigned_driver_ids():
+                    raise BulkDataError(f"Driver {driver_id} is already in another team")
+
+    def add(self, collection, record):
+        """Make an imported record available to later references"""
+        if collection == "drivers":
+            self.driver_ids().add(record["id"])
+        elif collection == "races":
+            self.race_ids().add(record["id"])
+        elif collection == "teams":
+            self.assigned_driver_ids().update(record["driver_ids"])
+
+class CollectionImporter:
+    """
+    Append validated records to a collection without loading it into memory.
+    Existing records are streamed into a temporary file while their keys are
+    indexed, new records are appended after them, and the temporary file only
+    replaces the collection on commit.
+    """
+
+    def __init__(self, collection, on_conflict="error", references=None):
+        self.collection = collection
+        self.schema = COLLECTIONS[collection]
+        self.on_conflict = on_conflict
+        self.references = references or ReferenceIndex()
+        self.file_path = self.schema["file"]
+        self.ids = set()
+        self.unique_keys = set()
+        self.max_id = 0
+        self.imported = 0
+        self.skipped = 0
+        # Races with imported results that still need fantasy points
+        self.unscored_race_ids = set()
+
+        # Held from before the collection is read until commit or abort, so
+        # writes made through the API in between are never overwritten
+        self.lock = file_lock(self.file_path)
+        self.lock.acquire()
+        fd, self.temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.file_path), prefix=f"{collection}.", suffix=".import"
+        )
+        self.f = os.fdopen(fd, "w")
+        self.writer = JsonArrayWriter(self.f)
+        try:
+            for record in iter_json_array(self.file_path):
+                self._index(record)
+                self.writer.write(record)
+        except BaseException:
+            self.abort()
+            raise
+
+    def _unique_key(self, record):
+        fields = self.schema.get("unique")
+        return tuple(record.get(field) for field in fields) if fields else None
+
+    def _index(self, record):
+        if "id" in record:
+            self.ids.add(record["id"])
+            self.max_id = max(self.max_id, record["id"])
+        key = self._unique_key(record)
+        if key is not None:
+            self.unique_keys.add(key)
+
+    def add(self, record):
+        """Validate and append a record, returning False if it was skipped"""
+        record = validate_record(self.collection, record)
+        key = self._unique_key(record)
+
+        conflict = None
+        if record.get("id") in self.ids:
+            conflict = f"ID {record['id']} already exists"
+        elif key is not None and key in self.unique_keys:
+            conflict = f"A record for {dict(zip(self.schema['unique'], key))} already exists"
+
+        if conflict:
+            if self.on_conflict == "skip":
+                self.skipped += 1
+                return False
+            raise BulkDataError(conflict)
+
+        self.references.check(self.collection, record)
+
+        # Assign a new ID (max existing ID + 1) when none was given
+        if "id" not in record:
+            record["id"] = self.max_id + 1
+
+        if self.collection in RESULT_SESSIONS and "fantasy_points" not in record:
+            self.unscored_race_ids.add(record["race_id"])
+
+        self._index(record)
+        self.writer.write(record)
+        self.references.add(self.collection, record)
+        self.imported += 1
+        return True
+
+    def commit(self):
+        """Replace the collection with the imported data"""
+        if not self.imported:
+            self.abort()
+            return
+        try:
+            self.writer.close()
+            self.f.close()
+            os.replace(self.temp_path, self.file_path)
+        finally:
+            self.lock.release()
+
+    def abort(self):
+        """Discard the imported data, leaving the collection unchanged"""
+        try:
+            self.f.close()
+            if os.path.exists(self.temp_path):
+                os.remove(self.temp_path)
+        finally:
+            self.lock.release()
+
+def score_races_in_place(race_ids):
+    """
+    Score the results of the given races with the active rule set.
+    Only those races' results are held in memory; the results files are
+    streamed through temporary files to update them, with the results files
+    locked so API writes made meanwhile are not lost.
+    """
+    result_files = [COLLECTIONS[collection]["file"] for collection in RESULT_SESSIONS]
+    with locked_files(COLLECTIONS["drivers"]["file"], *result_files):
+        rule_set = get_active_rule_set()
+        teammates = build_teammates(list(iter_json_array(COLLECTIONS["drivers"]["file"])))
+
+        weekends = {race_id: {session: [] for session in SESSIONS} for race_id in race_ids}
+        for collection, session in RESULT_SESSIONS.items():
+            for record in iter_json_array(COLLECTIONS[collection]["file"]):
+                if record["race_id"] in weekends:
+                    weekends[record["race_id"]][session].append(record)
+
+        scores = {session: {} for session in SESSIONS}
+        for session_results in weekends.values():
+            race_scores = score_race_weekend(rule_set, session_results, teammates)
+            for session in SESSIONS:
+                scores[session].update(race_scores[session])
+        del weekends
+
+        for collection, session in RESULT_SESSIONS.items():
+            session_scores = scores[session]
+            if not session_scores:
+                continue
+            file_path = COLLECTIONS[collection]["file"]
+            fd, temp_path = tempfile.mkstemp(
+                dir=os.path.dirname(file_path), prefix=f"{collection}.", suffix=".import"
+            )
+            with os.fdopen(fd, "w") as f:
+                writer = JsonArrayWriter(f)
+                for record in iter_json_array(file_path):
+                    if record["id"] in session_scores:
+                        record["fantasy_points"] = session_scores[record["id"]]
+                    writer.write(record)
+                writer.close()
+            os.replace(temp_path, file_path)
+
+def iter_records(lines, file_format):
+    """Yield (line_number, record) from an iterable of text lines"""
+    if file_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise BulkDataError(f"Line {line_number}: invalid JSON ({e.msg})")
+
+def import_files(collection):
+    """
+    Data files an import into a collection reads or rewrites.
+    Results are checked against races and drivers and may rescore every
+    results collection; teams are checked against drivers.
+    """
+    if collection == "all":
+        names = set(COLLECTIONS)
+    elif collection in RESULT_SESSIONS:
+        names = set(RESULT_SESSIONS) | {"races", "drivers"}
+    elif collection == "teams":
+        names = {"teams", "drivers"}
+    else:
+        names = {collection}
+    return [COLLECTIONS[name]["file"] for name in names]
+
+def import_records(collection, lines, file_format="ndjson", on_conflict="error"):
+    """
+    Import records from an iterable of text lines into a collection.
+    With collection "all", each NDJSON record names its collection in a
+    "collection" field. Nothing is written unless every record is valid.
+    Records must refer to existing (or already imported) races and drivers.
+    Returns import counts per collection.
+    """
+    if collection == "all" and file_format != "ndjson":
+        raise BulkDataError("Importing all collections requires NDJSON")
+    if collection != "all" and collection not in COLLECTIONS:
+        raise BulkDataError(f"Unknown collection '{collection}'")
+    if file_format not in FORMATS:
+        raise BulkDataError(f"Unknown format '{file_format}'")
+    if on_conflict not in ("error", "skip"):
+        raise BulkDataError(f"Unknown conflict mode '{on_conflict}'")
+
+    # Take the lock of every file the import may read or rewrite up front, so
+    # neither other imports nor API writes can change them until it is done
+    with locked_files(*import_files(collection)):
+        references = ReferenceIndex()
+        importers = {}
+        try:
+            for line_number, record in iter_records(lines, file_format):
+                target = collection
+                if collection == "all":
+                    target = record.pop("collection", None) if isinstance(record, dict) else None
+                    if target not in COLLECTIONS:
+                        raise BulkDataError(f"Line {line_number}: unknown collection {target!r}")
+
+                if target not in importers:
+                    importers[target] = CollectionImporter(target, on_conflict, references)
+                try:
+                    importers[target].add(record)
+                except BulkDataError as e:
+                    raise BulkDataError(f"Line {line_number}: {e}")
+        except BaseException:
+            for importer in importers.values():
+                importer.abort()
+            raise
+
+        for importer in importers.values():
+            importer.commit()
+
+        unscored_race_ids = set()
+        for importer in importers.values():
+            unscored_race_ids.update(importer.unscored_race_ids)
+        if unscored_race_ids:
+            score_races_in_place(unscored_race_ids)
+
+    return {
+        name: {"imported": importer.imported, "skipped": importer.skipped}
+        for name, importer in importers.items()
+    }
+
+def export_records(collection, file_format="ndjson"):
+    """Yield a collection as NDJSON or CSV text, one record at a time"""
+    if collection == "all" and file_format != "ndjson":
+        raise BulkDataError("Exporting all collections requires NDJSON")
+    if collection != "all" and collection not in COLLECTIONS:
+        raise BulkDataError(f"Unknown collection '{collection}'")
+    if file_format not in FORMATS:
+        raise BulkDataError(f"Unknown format '{file_format}'")
+
+    if collection == "all":
+        for name, schema in COLLECTIONS.items():
+            for record in iter_json_array(schema["file"]):
+                yield json.dumps({"collection": name, **record}) + "\n"
+        return
+
+    schema = COLLECTIONS[collection]
+    if file_format == "ndjson":
+        for record in iter_json_array(schema["file"]):
+            yield json.dumps(record) + "\n"
+        return
+
+    # Reuse a single buffer so each CSV row is produced on its own
+    buffer = io.StringIO()
+    writer = csv.DictWriter(
+        buffer, fieldnames=list(schema["fields"]), extrasaction="ignore", lineterminator="\n"
+    )
+    writer.writeheader()
+    for record in iter_json_array(schema["file"]):
+        writer.writerow({field: format_csv_value(value) for field, value in record.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def detect_format(file_path, file_format):
+    """Use the given format, or infer it from the file extension"""
+    if file_format:
+        return file_format
+    return "csv" if file_path and file_path.lower().endswith(".csv") else "ndjson"
+
+def main():
+    """Import or export collections from the command line"""
+    parser = argparse.ArgumentParser(description="Bulk import and export F1 Fantasy data")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a collection")
+    export_parser.add_argument("collection", choices=list(COLLECTIONS) + ["all"])
+    export_parser.add_argument("-f", "--format", choices=FORMATS)
+    export_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+
+    import_parser = subparsers.add_parser("import", help="Import records into a collection")
+    import_parser.add_argument("collection", choices=list(COLLECTIONS) + ["all"])
+    import_parser.add_argument("input", help="Input file, or - for stdin")
+    import_parser.add_argument("-f", "--format", choices=FORMATS)
+    import_parser.add_argument("--on-conflict", choices=["error", "skip"], default="error")
+
+    args = parser.parse_args()
+
+    try:
+        if args.command == "export":
+            file_format = detect_format(args.output, args.format)
+            out = open(args.output, "w", newline="") if args.output else sys.stdout
+            try:
+                for chunk in export_records(args.collection, file_format):
+                    out.write(chunk)
+            finally:
+                if args.output:
+                    out.close()
+        else:
+            file_format = detect_format(args.input, args.format)
+            if args.input == "-":
+                counts = import_records(args.collection, sys.stdin, file_format, args.on_conflict)
+            else:
+                with open(args.input, "r", newline="") as f:
+                    counts = import_records(args.collection, f, file_format, args.on_conflict)
+            for name, count in counts.items():
+                print(f"{name}: imported {count['imported']}, skipped {count['skipped']}")
+    except (BulkDataError, csv.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
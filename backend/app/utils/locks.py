@@ -0,0 +1,40 @@
+"""
+Locks for the JSON data files.
+
+Every writer in this process (the API routers, rescoring jobs and bulk
+imports) holds the lock of each file it reads and rewrites, so their
+read-modify-write cycles cannot interleave and lose each other's changes.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+_file_locks = {}
+_file_locks_guard = threading.Lock()
+
+def file_lock(file_path):
+    """Get the lock of a data file, keyed by its real path"""
+    key = os.path.realpath(file_path)
+    with _file_locks_guard:
+        if key not in _file_locks:
+            _file_locks[key] = threading.RLock()
+        return _file_locks[key]
+
+@contextmanager
+def locked_files(*file_paths):
+    """
+    Hold the locks of several data files.
+    Locks are taken in a fixed order, so writers that need overlapping sets of
+    files cannot deadlock. A thread must take every lock it needs in one call
+    rather than nesting calls for different files.
+    """
+    locks = [file_lock(path) for path in sorted({os.path.realpath(p) for p in file_paths})]
+    acquired = []
+    try:
+        for lock in locks:
+            lock.acquire()
+            acquired.append(lock)
+        yield
+    finally:
+        for lock in reversed(acquired):
+            lock.release()
@@ -0,0 +1,194 @@
+"""
+Server-side fantasy scoring.
+Mirrors the rules in frontend/js/scoring.js, with every table and constant
+taken from a versioned rule set instead of being hard-coded.
+"""
+import hashlib
+import json
+import os
+
+# Define file paths
+SCORING_RULES_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "scoring_rules.json")
+
+# Rule set used when no rule sets have been stored yet.
+# Matches the scoring the frontend applies when results are entered.
+DEFAULT_RULE_SET = {
+    "id": 1,
+    "name": "Default",
+    "race_points": [25, 18, 15, 12, 10, 8, 6, 4, 2, 1],
+    "sprint_points": [8, 7, 6, 5, 4, 3, 2, 1],
+    "qualifying_points": [12, 8, 6, 4, 2, 1],
+    "sprint_qualifying_points": [12, 8, 6, 4, 2, 1],
+    "fastest_lap_points": 1,
+    "fastest_lap_max_position": 10,
+    "position_gain_points": 1,
+    "dnf_penalty": -5,
+    "teammate_bonus": 2,
+    # Points for beating the corresponding driver of another team
+    "matchup_points": 2,
+    "is_active": True,
+}
+
+# Session types, in the order used for the results collections
+SESSIONS = ["race", "sprint", "qualifying", "sprint_qualifying"]
+
+# Which points table each session uses, and which session its grid comes from
+POINTS_TABLES = {
+    "race": "race_points",
+    "sprint": "sprint_points",
+    "qualifying": "qualifying_points",
+    "sprint_qualifying": "sprint_qualifying_points",
+}
+GRID_SESSIONS = {
+    "race": "qualifying",
+    "sprint": "sprint_qualifying",
+}
+
+def read_rule_sets():
+    """Read scoring rule sets, falling back to the default rule set"""
+    try:
+        with open(SCORING_RULES_FILE, "r") as f:
+            rule_sets = json.load(f)
+    except FileNotFoundError:
+        rule_sets = []
+    return rule_sets or [dict(DEFAULT_RULE_SET)]
+
+def get_active_rule_set():
+    """Get the rule set currently applied to stored results"""
+    rule_sets = read_rule_sets()
+    for rule_set in rule_sets:
+        if rule_set.get("is_active"):
+            return rule_set
+    return rule_sets[-1]
+
+def position_points(table, position):
+    """Look up points for a finishing position in a points table"""
+    if not isinstance(position, int) or position < 1 or position > len(table):
+        return 0
+    return table[position - 1]
+
+def build_teammates(drivers):
+    """Map each driver ID to the IDs of drivers with the same constructor"""
+    by_constructor = {}
+    for driver in drivers:
+        if driver.get("constructor"):
+            by_constructor.setdefault(driver["constructor"], []).append(driver["id"])
+
+    teammates = {}
+    for driver in drivers:
+        same_constructor = by_constructor.get(driver.get("constructor"), [])
+        teammates[driver["id"]] = [d_id for d_id in same_constructor if d_id != driver["id"]]
+    return teammates
+
+def beat_all_teammates(driver_id, position, teammates, positions):
+    """
+    Whether a driver finished ahead of every teammate with a result.
+    At least one teammate must have a result for the bonus to apply.
+    """
+    teammates_with_results = 0
+    for teammate_id in teammates.get(driver_id, []):
+        if teammate_id in positions:
+            teammates_with_results += 1
+            if positions[teammate_id] <= position:
+                return False
+    return teammates_with_results > 0
+
+def score_race_weekend(rule_set, session_results, teammates):
+    """
+    Calculate fantasy points for every result of a single race weekend.
+
+    session_results maps a session type to the list of results for that
+    race. Returns a dict mapping each session type to {result_id: points}.
+    """
+    positions = {
+        session: {r["driver_id"]: r["position"] for r in session_results.get(session, [])}
+        for session in SESSIONS
+    }
+
+    scores = {}
+    for session in SESSIONS:
+        table = rule_set[POINTS_TABLES[session]]
+        grid = positions.get(GRID_SESSIONS.get(session), {})
+        session_scores = {}
+
+        for result in session_results.get(session, []):
+            driver_id = result["driver_id"]
+            position = result["position"]
+            points = position_points(table, position)
+
+            if (session == "race" and result.get("fastest_lap")
+                    and isinstance(position, int)
+                    and position <= rule_set["fastest_lap_max_position"]):
+                points += rule_set["fastest_lap_points"]
+
+            # Only results that record finishing status can be penalised
+            if result.get("finished") is False:
+                points += rule_set["dnf_penalty"]
+
+            if driver_id in grid and isinstance(position, int):
+                positions_gained = grid[driver_id] - position
+                if positions_gained > 0:
+                    points += positions_gained * rule_set["position_gain_points"]
+
+            if beat_all_teammates(driver_id, position, teammates, positions[session]):
+                points += rule_set["teammate_bonus"]
+
+            session_scores[result["id"]] = points
+
+        scores[session] = session_scores
+    return scores
+
+def race_fingerprint(session_results):
+    """
+    Hash the fields of a race weekend's results that scoring depends on.
+    Two weekends with the same fingerprint always score the same.
+    """
+    inputs = sorted(
+        (session, r["id"], r["driver_id"], r.get("position"), r.get("fastest_lap"), r.get("finished"))
+        for session in SESSIONS
+        for r in session_results.get(session, [])
+    )
+    return hashlib.sha1(json.dumps(inputs).encode()).hexdigest()
+
+def score_races(rule_set, results_by_race, teammates):
+    """
+    Score several race weekends, as one chunk of a rescoring job.
+    Takes and returns plain data so it can run in a worker process.
+    Returns {"races": {race_id: fingerprint}, "scores": {session: {result_id: points}}}.
+    """
+    fingerprints = {}
+    scores = {session: {} for session in SESSIONS}
+    for race_id, session_results in results_by_race.items():
+        fingerprints[race_id] = race_fingerprint(session_results)
+        race_scores = score_race_weekend(rule_set, session_results, teammates)
+        for session in SESSIONS:
+            scores[session].update(race_scores[session])
+    return {"races": fingerprints, "scores": scores}
+
+def build_matchup_matrix(teams, positions):
+    """
+    Compare every pair of teams in a single session.
+
+    positions maps driver ID to position for the session. Each team's drivers
+    are ranked best first, and the nth driver of one team is compared with the
+    nth driver of the other, as in ScoringSystem.calculateTeamMatchupPoints.
+    Drivers without a result in the session are left out.
+    Returns {team_id: {other_team_id: wins}}.
+    """
+    # Rank each team's positions once, rather than once per pair
+    ranked = {
+        team["id"]: sorted(positions[d_id] for d_id in team["driver_ids"] if d_id in positions)
+        for team in teams
+    }
+
+    matrix = {}
+    for team_id, team_positions in ranked.items():
+        row = {}
+        for other_id, other_positions in ranked.items():
+            if other_id == team_id:
+                continue
+            row[other_id] = sum(
+                1 for mine, theirs in zip(team_positions, other_positions) if mine < theirs
+            )
+        matrix[team_id] = row
+    return matrix
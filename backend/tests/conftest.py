@@ -0,0 +1,33 @@
+import os
+import shutil
+
+import pytest
+
+from app.routers import drivers, matchups, races, recommendations, results, scoring, teams
+from app.utils import bulk_io
+from app.utils import scoring as scoring_rules
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "app", "data")
+
+# Modules holding paths into the data directory
+MODULES = [drivers, teams, races, results, recommendations, scoring, matchups, bulk_io, scoring_rules]
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Point every module at a copy of the seed data, so tests can write freely"""
+    shutil.copytree(DATA_DIR, tmp_path, dirs_exist_ok=True)
+    real_data_dir = os.path.realpath(DATA_DIR)
+
+    def moved(path):
+        return os.path.join(tmp_path, os.path.relpath(os.path.realpath(path), real_data_dir))
+
+    for module in MODULES:
+        for name, value in list(vars(module).items()):
+            if name.endswith(("_FILE", "_DIR")) and isinstance(value, str):
+                monkeypatch.setattr(module, name, moved(value))
+    for session, file_path in results.RESULTS_FILES.items():
+        monkeypatch.setitem(results.RESULTS_FILES, session, moved(file_path))
+    for schema in bulk_io.COLLECTIONS.values():
+        monkeypatch.setitem(schema, "file", moved(schema["file"]))
+
+    return tmp_path
@@ -0,0 +1,156 @@
+import io
+import json
+import os
+import threading
+
+import pytest
+
+from app.routers import results
+from app.utils import bulk_io
+from app.utils.bulk_io import (
+    BulkDataError,
+    JsonArrayWriter,
+    export_records,
+    import_records,
+    iter_json_array,
+)
+
+def ndjson(*records):
+    return [json.dumps(record) + "\n" for record in records]
+
+def leftover_temp_files(data_dir):
+    return [name for name in os.listdir(data_dir) if name.endswith(".import")]
+
+@pytest.mark.parametrize("items", [
+    [],
+    [{"id": 1, "name": "a, [b]", "tags": ["x", {"y": "}"}]}, 2.5, "]", None, [[]]],
+    [{"id": i, "name": f"Driver {i}"} for i in range(50)],
+])
+def test_json_array_round_trip(tmp_path, items):
+    file_path = tmp_path / "items.json"
+    with open(file_path, "w") as f:
+        writer = JsonArrayWriter(f)
+        for item in items:
+            writer.write(item)
+        writer.close()
+
+    assert file_path.read_text() == json.dumps(items, indent=2)
+    assert list(iter_json_array(file_path, chunk_size=7)) == items
+
+def test_iter_json_array_rejects_truncated_file(tmp_path):
+    file_path = tmp_path / "items.json"
+    file_path.write_text('[{"id": 1}, {"id": 2')
+
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_array(file_path, chunk_size=4))
+
+def test_import_assigns_ids_and_keeps_existing_records(data_dir):
+    before = results.read_data(bulk_io.COLLECTIONS["drivers"]["file"])
+
+    counts = import_records("drivers", ndjson({"name": "New Driver", "number": 50.0}))
+
+    drivers = results.read_data(bulk_io.COLLECTIONS["drivers"]["file"])
+    assert counts == {"drivers": {"imported": 1, "skipped": 0}}
+    assert drivers[:-1] == before
+    assert drivers[-1] == {"name": "New Driver", "number": 50, "id": max(d["id"] for d in before) + 1}
+    assert leftover_temp_files(data_dir) == []
+
+@pytest.mark.parametrize("record, message", [
+    ({"id": 1, "name": "Duplicate"}, "ID 1 already exists"),
+    ({"name": "Bad Number", "number": 1.9}, "must be an integer"),
+    ({"name": "Extra", "extra": {"a": 1}}, "Unknown field 'extra'"),
+    ({"number": 5}, "Missing required fields: name"),
+])
+def test_invalid_import_leaves_collection_unchanged(data_dir, record, message):
+    file_path = bulk_io.COLLECTIONS["drivers"]["file"]
+    with open(file_path) as f:
+        before = f.read()
+
+    with pytest.raises(BulkDataError, match=message):
+        import_records("drivers", ndjson({"name": "Valid Driver"}, record))
+
+    with open(file_path) as f:
+        assert f.read() == before
+    assert leftover_temp_files(data_dir) == []
+
+def test_conflicts_can_be_skipped(data_dir):
+    existing = results.read_data(bulk_io.COLLECTIONS["race_results"]["file"])[0]
+
+    counts = import_records(
+        "race_results",
+        ndjson(
+            {"race_id": existing["race_id"], "driver_id": existing["driver_id"], "position": 9},
+            {"race_id": 10, "driver_id": 1, "position": 1},
+        ),
+        on_conflict="skip",
+    )
+
+    assert counts == {"race_results": {"imported": 1, "skipped": 1}}
+
+def test_results_must_refer_to_existing_races_and_drivers(data_dir):
+    with pytest.raises(BulkDataError, match="Race with ID 999 not found"):
+        import_records("race_results", ndjson({"race_id": 999, "driver_id": 1, "position": 1}))
+    with pytest.raises(BulkDataError, match="Driver with ID 999 not found"):
+        import_records("race_results", ndjson({"race_id": 10, "driver_id": 999, "position": 1}))
+
+def test_imported_results_without_points_are_scored(data_dir):
+    import_records(
+        "race_results",
+        ndjson(
+            {"race_id": 10, "driver_id": 1, "position": 1, "finished": True},
+            {"race_id": 10, "driver_id": 2, "position": 2, "finished": True},
+        ),
+    )
+
+    race_results = results.read_data(bulk_io.COLLECTIONS["race_results"]["file"])
+    points = {r["driver_id"]: r["fantasy_points"] for r in race_results if r["race_id"] == 10}
+    # Driver 1 beat teammate driver 2
+    assert points == {1: 25 + 2, 2: 18}
+
+def test_csv_export_imports_back_as_conflicts(data_dir):
+    exported = "".join(export_records("race_results", "csv"))
+
+    counts = import_records("race_results", io.StringIO(exported), "csv", on_conflict="skip")
+
+    rows = len(results.read_data(bulk_io.COLLECTIONS["race_results"]["file"]))
+    assert counts == {"race_results": {"imported": 0, "skipped": rows}}
+
+def test_import_waits_for_and_keeps_concurrent_api_writes(data_dir):
+    started, proceed = threading.Event(), threading.Event()
+
+    def lines():
+        yield from ndjson({"race_id": 3, "driver_id": 1, "position": 1})
+        started.set()
+        proceed.wait(5)
+        yield from ndjson({"race_id": 3, "driver_id": 2, "position": 2})
+
+    errors = []
+
+    def run(target, *args):
+        try:
+            target(*args)
+        except Exception as e:
+            errors.append(e)
+
+    importer = threading.Thread(target=run, args=(import_records, "race_results", lines()))
+    importer.start()
+    assert started.wait(5)
+
+    writer = threading.Thread(
+        target=run,
+        args=(results.create_race_result, {"race_id": 3, "driver_id": 3, "position": 3}),
+    )
+    writer.start()
+    writer.join(0.2)
+    # The API write waits for the import to finish with the file
+    assert writer.is_alive()
+
+    proceed.set()
+    importer.join(5)
+    writer.join(5)
+
+    assert errors == []
+    race_results = results.read_data(results.RACE_RESULTS_FILE)
+    assert sorted(r["driver_id"] for r in race_results if r["race_id"] == 3) == [1, 2, 3]
+    ids = [r["id"] for r in race_results]
+    assert len(ids) == len(set(ids))
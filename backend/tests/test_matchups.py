@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.routers import matchups, results, scoring
+from app.utils.scoring import build_matchup_matrix, read_rule_sets
+
+def test_build_matchup_matrix_compares_ranked_drivers():
+    teams = [
+        {"id": 1, "driver_ids": [2, 1]},
+        {"id": 2, "driver_ids": [3, 4]},
+        {"id": 3, "driver_ids": [5, 6]},
+    ]
+    # Driver 6 has no result, so team 3 only has one driver to compare
+    positions = {1: 1, 2: 6, 3: 2, 4: 3, 5: 4}
+
+    assert build_matchup_matrix(teams, positions) == {
+        1: {2: 1, 3: 1},
+        2: {1: 1, 3: 1},
+        3: {1: 0, 2: 0},
+    }
+
+def test_matchup_points_follow_active_rule_set(data_dir, monkeypatch):
+    monkeypatch.setattr(matchups, "_matchup_cache", {})
+    before = asyncio.run(matchups.get_season_matchups())
+
+    rule_set = scoring.create_scoring_rule_set({"matchup_points": 3})
+    rule_sets = read_rule_sets()
+    for r in rule_sets:
+        r["is_active"] = r["id"] == rule_set["id"]
+    results.write_data(scoring.SCORING_RULES_FILE, rule_sets)
+    after = asyncio.run(matchups.get_season_matchups())
+
+    for team_id, row in after["head_to_head"].items():
+        for other_id, totals in row.items():
+            assert totals["wins"] == before["head_to_head"][team_id][other_id]["wins"]
+            assert totals["points"] == totals["wins"] * 3
+
+def test_race_matchups_are_cached_until_results_change(data_dir, monkeypatch):
+    monkeypatch.setattr(matchups, "_matchup_cache", {})
+    race_id = results.read_data(results.RACE_RESULTS_FILE)[0]["race_id"]
+
+    first = asyncio.run(matchups.get_race_matchups_endpoint(race_id))
+    second = asyncio.run(matchups.get_race_matchups_endpoint(race_id))
+    assert second["sessions"] is first["sessions"]
+
+    race_results = results.read_data(results.RACE_RESULTS_FILE)
+    race_results[0]["position"], race_results[1]["position"] = (
+        race_results[1]["position"], race_results[0]["position"]
+    )
+    results.write_data(results.RACE_RESULTS_FILE, race_results)
+    third = asyncio.run(matchups.get_race_matchups_endpoint(race_id))
+    assert third["sessions"] is not first["sessions"]
+
+def test_cache_entries_for_races_without_results_are_dropped(data_dir, monkeypatch):
+    monkeypatch.setattr(matchups, "_matchup_cache", {998: (None, {}), 999: (None, {})})
+
+    asyncio.run(matchups.get_season_matchups())
+    assert 998 not in matchups._matchup_cache and 999 not in matchups._matchup_cache
+
+    matchups._matchup_cache[999] = (None, {})
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(matchups.get_race_matchups_endpoint(999))
+    assert error.value.status_code == 404
+    assert 999 not in matchups._matchup_cache
@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+import random
+import time
+
+from app.routers import recommendations
+from app.routers.recommendations import project_driver_points, search_transfers
+
+def brute_force_gains(roster, free_agents, max_swaps, limit):
+    """Gains of the best swap sets, found by trying every one"""
+    gains = []
+    for swaps in range(1, max_swaps + 1):
+        for outs in itertools.combinations(roster, swaps):
+            for ins in itertools.combinations(free_agents, swaps):
+                gain = sum(p for _, p in ins) - sum(p for _, p in outs)
+                if gain > 0:
+                    gains.append(gain)
+    return sorted(gains, reverse=True)[:limit]
+
+def test_search_transfers_matches_brute_force():
+    rng = random.Random(2024)
+    for _ in range(300):
+        roster = [(i, rng.randint(0, 30)) for i in range(rng.randint(1, 5))]
+        free_agents = [(100 + i, rng.randint(0, 30)) for i in range(rng.randint(0, 7))]
+        max_swaps = rng.randint(1, 4)
+        limit = rng.randint(1, 10)
+
+        candidates = search_transfers(roster, free_agents, max_swaps, limit)
+
+        assert [gain for gain, _, _, _ in candidates] == brute_force_gains(
+            roster, free_agents, max_swaps, limit
+        )
+        points = dict(roster + free_agents)
+        for gain, _, outs, ins in candidates:
+            assert len(outs) == len(ins) <= max_swaps
+            assert sum(points[d] for d in ins) - sum(points[d] for d in outs) == gain
+
+def test_search_transfers_caps_max_swaps():
+    roster = [(i, i) for i in range(5)]
+    free_agents = [(100 + i, 10 + i) for i in range(15)]
+
+    start = time.perf_counter()
+    candidates = search_transfers(roster, free_agents, 3000000, 5)
+
+    assert time.perf_counter() - start < 5
+    assert candidates[0][0] == sum(range(20, 25)) - sum(range(5))
+
+def test_project_driver_points_uses_recent_races():
+    score_vectors = {"race_ids": [1, 2, 3], "vectors": {1: [30, 0, 6], 2: [5, 5, 5]}}
+
+    projections = project_driver_points(score_vectors, [1, 2, 3], form_races=2)
+
+    assert projections == {1: 3.0, 2: 5.0, 3: 0.0}
+
+def test_transfer_recommendations_only_suggest_free_agents(data_dir):
+    response = asyncio.run(
+        recommendations.get_transfer_recommendations(1, max_swaps=2, form_races=3, limit=10)
+    )
+
+    team_driver_ids = set(recommendations.read_data(recommendations.TEAMS_FILE)[0]["driver_ids"])
+    assigned_driver_ids = {
+        d_id for team in recommendations.read_data(recommendations.TEAMS_FILE)
+        for d_id in team["driver_ids"]
+    }
+    gains = [r["projected_gain"] for r in response["recommendations"]]
+    assert gains == sorted(gains, reverse=True)
+    for recommendation in response["recommendations"]:
+        for swap in recommendation["swaps"]:
+            assert swap["current_driver_id"] in team_driver_ids
+            assert swap["new_driver_id"] not in assigned_driver_ids
@@ -0,0 +1,163 @@
+import json
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+from app.routers import results, scoring
+from app.utils.scoring import (
+    DEFAULT_RULE_SET,
+    SESSIONS,
+    build_teammates,
+    race_fingerprint,
+    read_rule_sets,
+    score_race_weekend,
+    score_races,
+)
+
+DRIVERS = [
+    {"id": 1, "constructor": "McLaren"},
+    {"id": 2, "constructor": "McLaren"},
+    {"id": 3, "constructor": "Ferrari"},
+]
+
+WEEKEND = {
+    "qualifying": [
+        {"id": 1, "driver_id": 1, "position": 3},
+        {"id": 2, "driver_id": 2, "position": 1},
+        {"id": 3, "driver_id": 3, "position": 2},
+    ],
+    "race": [
+        {"id": 1, "driver_id": 1, "position": 1, "fastest_lap": True, "finished": True},
+        {"id": 2, "driver_id": 2, "position": 2, "fastest_lap": False, "finished": True},
+        {"id": 3, "driver_id": 3, "position": 5, "fastest_lap": False, "finished": False},
+    ],
+}
+
+def activate(rule_set_id):
+    rule_sets = read_rule_sets()
+    for rule_set in rule_sets:
+        rule_set["is_active"] = rule_set["id"] == rule_set_id
+    results.write_data(scoring.SCORING_RULES_FILE, rule_sets)
+
+def test_score_race_weekend():
+    scores = score_race_weekend(DEFAULT_RULE_SET, WEEKEND, build_teammates(DRIVERS))
+
+    # Win + fastest lap + 2 places gained + beat teammate
+    assert scores["race"][1] == 25 + 1 + 2 + 2
+    assert scores["race"][2] == 18
+    # P5 with a DNF penalty; no teammate with a result
+    assert scores["race"][3] == 10 - 5
+    assert scores["qualifying"] == {1: 6, 2: 12 + 2, 3: 8}
+    assert scores["sprint"] == {} and scores["sprint_qualifying"] == {}
+
+def test_race_fingerprint_ignores_stored_points():
+    rescored = {
+        session: [dict(r, fantasy_points=99) for r in rows] for session, rows in WEEKEND.items()
+    }
+    moved = {**WEEKEND, "race": [dict(WEEKEND["race"][0], position=4)] + WEEKEND["race"][1:]}
+
+    assert race_fingerprint(rescored) == race_fingerprint(WEEKEND)
+    assert race_fingerprint(moved) != race_fingerprint(WEEKEND)
+
+@pytest.mark.parametrize("rule_set", [
+    {"id": 5},
+    {"is_active": True},
+    {"bonus_points": 1},
+    {"dnf_penalty": True},
+    {"dnf_penalty": "-10"},
+    {"race_points": [25, 18.5]},
+    {"name": 2},
+])
+def test_validate_rule_set_rejects_invalid_rules(rule_set):
+    with pytest.raises(HTTPException) as error:
+        scoring.validate_rule_set(rule_set)
+    assert error.value.status_code == 400
+
+def test_create_rule_set_copies_active_rules(data_dir):
+    rule_set = scoring.create_scoring_rule_set({"name": "Harsh DNF", "dnf_penalty": -10})
+
+    assert rule_set["id"] == 2
+    assert rule_set["is_active"] is False
+    assert rule_set["dnf_penalty"] == -10
+    assert rule_set["race_points"] == DEFAULT_RULE_SET["race_points"]
+
+def test_new_results_are_scored_with_active_rule_set(data_dir):
+    scoring.create_scoring_rule_set({"dnf_penalty": -10})
+    activate(2)
+
+    result = results.create_race_result(
+        {"race_id": 10, "driver_id": 1, "position": 11, "finished": False, "fantasy_points": 99}
+    )
+
+    assert result["fantasy_points"] == -10
+    stored = [r for r in results.read_data(results.RACE_RESULTS_FILE) if r["id"] == result["id"]]
+    assert stored[0]["fantasy_points"] == -10
+
+def test_update_without_scoring_fields_is_rejected(data_dir):
+    before = results.read_data(results.RACE_RESULTS_FILE)
+
+    with pytest.raises(HTTPException) as error:
+        results.update_race_result(before[0]["id"], {"position": 3})
+
+    assert error.value.status_code == 400
+    assert results.read_data(results.RACE_RESULTS_FILE) == before
+
+def group_by_race():
+    results_by_race = {}
+    for session, file_path in results.RESULTS_FILES.items():
+        for result in results.read_data(file_path):
+            race_results = results_by_race.setdefault(result["race_id"], {s: [] for s in SESSIONS})
+            race_results[session].append(result)
+    return results_by_race
+
+def test_apply_scores_rescores_races_changed_after_staging(data_dir):
+    scoring.create_scoring_rule_set({"dnf_penalty": -10})
+    rule_set = read_rule_sets()[-1]
+    teammates = build_teammates(results.read_data(scoring.DRIVERS_FILE))
+    staged = [json.loads(json.dumps(score_races(rule_set, group_by_race(), teammates)))]
+
+    # A result edited while the job was running
+    race_results = results.read_data(results.RACE_RESULTS_FILE)
+    race_results[0]["position"] = 20
+    race_results[0]["finished"] = False
+    results.write_data(results.RACE_RESULTS_FILE, race_results)
+
+    scoring.apply_scores(staged, rule_set, teammates)
+
+    expected = {}
+    for session_results in group_by_race().values():
+        race_scores = score_race_weekend(rule_set, session_results, teammates)
+        for session in SESSIONS:
+            expected.update({(session, r_id): p for r_id, p in race_scores[session].items()})
+    edited_id = str(race_results[0]["id"])
+    assert staged[0]["scores"]["race"][edited_id] != expected[("race", race_results[0]["id"])]
+    for session, file_path in results.RESULTS_FILES.items():
+        for result in results.read_data(file_path):
+            assert result["fantasy_points"] == expected[(session, result["id"])]
+    assert [r["id"] for r in read_rule_sets() if r["is_active"]] == [2]
+
+def test_rescoring_job_runs_and_activates_rule_set(data_dir):
+    scoring.create_scoring_rule_set({"dnf_penalty": -10})
+    background_tasks = BackgroundTasks()
+
+    job = scoring.create_rescoring_job(background_tasks, 2, chunk_size=1, workers=1)
+    scoring.run_rescoring_job(job["id"])
+
+    job = scoring.find_job(results.read_data(scoring.RESCORING_JOBS_FILE), job["id"])
+    assert job["status"] == "completed", job["error"]
+    assert job["processed_races"] == job["total_races"] == len(group_by_race())
+    assert [r["id"] for r in read_rule_sets() if r["is_active"]] == [2]
+    assert not scoring._running_jobs
+
+def test_resume_is_refused_while_another_job_runs(data_dir, monkeypatch):
+    results.write_data(scoring.RESCORING_JOBS_FILE, [
+        {"id": 1, "status": "failed"},
+        {"id": 2, "status": "running"},
+    ])
+    monkeypatch.setattr(scoring, "_running_jobs", {2})
+
+    with pytest.raises(HTTPException) as error:
+        scoring.resume_rescoring_job(1, BackgroundTasks())
+
+    assert error.value.status_code == 409
+    assert scoring._running_jobs == {2}